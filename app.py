@@ -3,32 +3,53 @@ import logging
 import tempfile
 import shutil
 import traceback
-import py_compile
-import sys
-import io
 import time
-from contextlib import redirect_stdout, redirect_stderr
+import secrets
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from datetime import datetime
 
+import orjson
 from flask import Flask, render_template, request, flash, jsonify, session
+from flask.json.provider import JSONProvider
 from werkzeug.utils import secure_filename
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase
+from flask_caching import Cache
+from flask_session import Session
+from redis import Redis
+from sqlalchemy import update
+from sqlalchemy.orm import load_only
+
+from extensions import db
+from models import CodeSnippet
+from utils import (
+    HAS_LIBURING, IoUringBatchEngine, compile_python_file, compile_python_source,
+    EXEC_MEMORY_LIMIT, EXEC_TIMEOUT, ExecutionLimitExceeded, init_sandbox, run_python_code,
+    sandboxed_command
+)
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+class OrjsonProvider(JSONProvider):
+    """JSON provider that parses and encodes with orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 # Initialize Flask app
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev_secret_key")
 
 # Configure SQLAlchemy
-class Base(DeclarativeBase):
-    pass
-
-db = SQLAlchemy(model_class=Base)
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_recycle": 300,
@@ -36,42 +57,32 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
 }
 db.init_app(app)
 
+# Configure caching
+cache = Cache(app, config={
+    'CACHE_TYPE': 'SimpleCache',
+    'CACHE_DEFAULT_TIMEOUT': 60,
+})
+
+# Keep sessions server-side in Redis when it's available
+session_redis = Redis.from_url(os.environ["REDIS_URL"]) if os.environ.get("REDIS_URL") else None
+if session_redis is not None:
+    app.config['SESSION_TYPE'] = 'redis'
+    app.config['SESSION_REDIS'] = session_redis
+    Session(app)
+
 # Configuration
 UPLOAD_FOLDER = os.path.join(tempfile.gettempdir(), 'python_compiler')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-ALLOWED_EXTENSIONS = {'py'}
+ALLOWED_EXTENSIONS = ('.py',)
+UPLOAD_BUFFER_SIZE = 4096 if os.name == 'posix' else 8192  # Match the OS page size
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 1 * 1024 * 1024  # 1MB max file size
-
-# Define database models
-class CodeSnippet(db.Model):
-    __tablename__ = 'code_snippets'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(100), nullable=False)
-    code = db.Column(db.Text, nullable=False)
-    description = db.Column(db.String(200))
-    language = db.Column(db.String(50), default='python')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    def __repr__(self):
-        return f"<CodeSnippet {self.title}>"
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'code': self.code,
-            'description': self.description,
-            'language': self.language,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
-
+SNIPPETS_PER_PAGE = 50
+MAX_TRACKED_FILES = 20  # Most recent uploaded/compiled files remembered per session
+PARALLEL_COMPILE_THRESHOLD = 2  # Uploads with more files than this compile in a process pool
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return filename.lower().endswith(ALLOWED_EXTENSIONS)
 
 
 def cleanup_temp_files():
@@ -80,35 +91,201 @@ def cleanup_temp_files():
         try:
             # Don't remove the directory, just clean out files older than 30 minutes
             current_time = time.time()
-            for file_name in os.listdir(UPLOAD_FOLDER):
-                file_path = os.path.join(UPLOAD_FOLDER, file_name)
-                # Check if it's a file and older than 30 minutes
-                if os.path.isfile(file_path) and (current_time - os.path.getmtime(file_path)) > (30 * 60):
-                    os.remove(file_path)
+            with os.scandir(UPLOAD_FOLDER) as entries:
+                for entry in entries:
+                    # Check if it's a file and older than 30 minutes
+                    if entry.is_file(follow_symlinks=False) and (current_time - entry.stat().st_mtime) > (30 * 60):
+                        os.remove(entry.path)
         except Exception as e:
             logger.error(f"Error cleaning up temp files: {e}")
 
 
-def compile_python_file(filepath):
-    """Compile a Python file and return any errors."""
-    try:
-        py_compile.compile(filepath, doraise=True)
-        return None, True
-    except py_compile.PyCompileError as e:
-        return str(e), False
-    except Exception as e:
-        return traceback.format_exc(), False
+CLEANUP_INTERVAL = 5 * 60  # Sweep the upload folder every 5 minutes
+_cleanup_thread = None
+_cleanup_thread_lock = threading.Lock()
+
+
+def _cleanup_loop():
+    """Periodically clean up temporary files in the background."""
+    while True:
+        time.sleep(CLEANUP_INTERVAL)
+        cleanup_temp_files()
+
+
+@app.before_request
+def start_cleanup_thread():
+    """
+    Start the background temp file sweeper if it isn't running in this process.
+    Started from the first request rather than at import so that every forked
+    worker gets its own sweeper and processes that merely import the app don't.
+    """
+    global _cleanup_thread
+    if _cleanup_thread is not None and _cleanup_thread.is_alive():
+        return
+    with _cleanup_thread_lock:
+        if _cleanup_thread is None or not _cleanup_thread.is_alive():
+            _cleanup_thread = threading.Thread(target=_cleanup_loop, name='temp-file-cleanup', daemon=True)
+            _cleanup_thread.start()
+
+
+_compile_pool = None
+_compile_pool_lock = threading.Lock()
+
+
+def get_compile_pool():
+    """Get the process pool used to compile multi-file uploads, creating it on first use."""
+    global _compile_pool
+    with _compile_pool_lock:
+        if _compile_pool is None:
+            _compile_pool = ProcessPoolExecutor()
+        return _compile_pool
+
+
+def discard_compile_pool(pool):
+    """Replace a broken compile pool, unless another request already has."""
+    global _compile_pool
+    with _compile_pool_lock:
+        if _compile_pool is pool:
+            _compile_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def compile_python_files(filepaths):
+    """Compile several Python files, in parallel when there are enough of them."""
+    if len(filepaths) > PARALLEL_COMPILE_THRESHOLD:
+        pool = get_compile_pool()
+        try:
+            return list(pool.map(compile_python_file, filepaths, chunksize=4))
+        except BrokenProcessPool:
+            # A compile worker died; start a fresh pool next time and compile this batch inline
+            logger.warning("Compile pool broke, replacing it")
+            discard_compile_pool(pool)
+    return [compile_python_file(filepath) for filepath in filepaths]
+
+
+def save_uploaded_files(uploads):
+    """Save (file, filepath) pairs to disk, batching the writes when io_uring is available."""
+    if HAS_LIBURING:
+        try:
+            engine = IoUringBatchEngine()
+        except OSError as e:
+            logger.warning(f"io_uring unavailable, falling back to blocking writes: {e}")
+        else:
+            with engine:
+                engine.write_files([(filepath, file.read()) for file, filepath in uploads])
+            return
+    
+    for file, filepath in uploads:
+        with open(filepath, 'wb') as out:
+            shutil.copyfileobj(file.stream, out, length=UPLOAD_BUFFER_SIZE)
+
+
+EXEC_POOL_SIZE = 4
+# Both waits together stay well below gunicorn's default 30 second worker timeout
+EXEC_QUEUE_TIMEOUT = 5  # Seconds a run may spend queued behind other runs
+EXEC_RESULT_TIMEOUT = EXEC_TIMEOUT + EXEC_QUEUE_TIMEOUT
+EXEC_OVERRUN_GRACE = EXEC_TIMEOUT + 2  # Further wait for a run that started late in the first one
+_exec_pool = None
+_exec_pool_lock = threading.Lock()
+
+
+def get_exec_pool():
+    """Get the sandbox process pool used to run user code, creating it on first use."""
+    global _exec_pool
+    with _exec_pool_lock:
+        if _exec_pool is None:
+            _exec_pool = ProcessPoolExecutor(max_workers=EXEC_POOL_SIZE, initializer=init_sandbox)
+        return _exec_pool
+
+
+def discard_exec_pool(pool, kill_workers=False):
+    """Replace a broken or stuck sandbox pool, unless another request already has."""
+    global _exec_pool
+    with _exec_pool_lock:
+        if _exec_pool is pool:
+            _exec_pool = None
+    if kill_workers:
+        # shutdown() never stops a running task, and user code can ignore the
+        # limit signals, so SIGKILL is the only reliable way to reclaim a worker
+        for process in tuple((pool._processes or {}).values()):
+            process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
 
 
 def execute_python_code(filepath):
-    """Execute a Python file and capture its output."""
-    stdout_capture = io.StringIO()
-    stderr_capture = io.StringIO()
+    """Execute a Python file in a sandbox worker process and capture its output."""
+    result = {
+        'stdout': '',
+        'stderr': '',
+        'exception': '',
+        'success': False
+    }
     
-    # Create a new environment for execution
-    original_sys_path = sys.path.copy()
-    sys.path.insert(0, os.path.dirname(filepath))
+    try:
+        with open(filepath, 'rb') as f:
+            code = f.read()
+        # Time and CPU limits are enforced per run inside the worker
+        pool = get_exec_pool()
+        future = pool.submit(run_python_code, code, filepath)
+        try:
+            return future.result(timeout=EXEC_RESULT_TIMEOUT)
+        except TimeoutError:
+            if future.cancel():
+                result['exception'] = 'All sandbox workers are busy, please try again shortly'
+                return result
+            # The run may have only just started, so let it use the rest of its own limits
+            return future.result(timeout=EXEC_OVERRUN_GRACE)
+    except TimeoutError:
+        # The worker outlived its own limits, e.g. by ignoring SIGALRM and SIGXCPU
+        result['exception'] = f'Execution did not finish within {EXEC_TIMEOUT} seconds'
+        discard_exec_pool(pool, kill_workers=True)
+    except BrokenProcessPool:
+        # A worker died outright, e.g. from os._exit() or a crash in C code
+        result['exception'] = 'The sandbox process running this code was terminated'
+        discard_exec_pool(pool)
+    except ExecutionLimitExceeded as e:
+        result['exception'] = str(e)
+    except Exception as e:
+        result['exception'] = traceback.format_exc()
     
+    return result
+
+
+def track_uploaded_files(filepaths):
+    """Remember the most recent files a session has uploaded or compiled."""
+    if not filepaths:
+        return
+    if session_redis is not None:
+        # Storing the key makes the session non-empty, so Flask-Session persists
+        # it and the client keeps the same sid across requests
+        key = session.setdefault('uploaded_files_key', f"uploaded_files:{session.sid}")
+        with session_redis.pipeline() as pipe:
+            pipe.lpush(key, *filepaths)
+            pipe.ltrim(key, 0, MAX_TRACKED_FILES - 1)
+            # Expire along with the server-side session itself
+            pipe.expire(key, int(app.permanent_session_lifetime.total_seconds()))
+            pipe.execute()
+    else:
+        session['uploaded_files'] = (session.get('uploaded_files', []) + filepaths)[-MAX_TRACKED_FILES:]
+
+
+# Alternative engines for /execute?engine=..., mapped to their executable.
+# These only pay off for compute-heavy user snippets; the app's own hot paths are
+# I/O, regex and ORM work and stay on CPython.
+EXECUTION_ENGINES = {
+    'pypy': 'pypy3',
+    'codon': 'codon',
+}
+# Address space each engine's run may use; PyPy's JIT and GC reserve more than CPython
+ENGINE_MEMORY_LIMITS = {
+    'pypy': 2 * EXEC_MEMORY_LIMIT,
+    'codon': EXEC_MEMORY_LIMIT,
+}
+CODON_BUILD_TIMEOUT = 15  # Seconds codon may spend compiling, outside the sandbox limits
+
+
+def execute_with_engine(filepath, engine):
+    """Execute a Python file with an alternative engine and capture its output."""
     result = {
         'stdout': '',
         'stderr': '',
@@ -116,37 +293,157 @@ def execute_python_code(filepath):
         'success': False
     }
     
+    executable = EXECUTION_ENGINES[engine]
+    if shutil.which(executable) is None:
+        result['exception'] = f'Execution engine {engine} is not installed'
+        return result
+    
+    cwd = os.path.dirname(filepath)
+    binary = None
     try:
-        # Capture stdout and stderr
-        with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-            # Execute the Python file
-            with open(filepath, 'r') as f:
-                code = f.read()
-                compiled_code = compile(code, filepath, 'exec')
-                exec(compiled_code, {})
+        if engine == 'codon':
+            # LLVM needs more than the sandbox allows, so build the program
+            # unrestricted and apply the limits only to running it
+            binary = os.path.splitext(filepath)[0]
+            try:
+                build = subprocess.run(
+                    [executable, 'build', '-release', '-o', binary, filepath],
+                    cwd=cwd,
+                    capture_output=True,
+                    text=True,
+                    timeout=CODON_BUILD_TIMEOUT
+                )
+            except subprocess.TimeoutExpired:
+                result['exception'] = f'Compilation timed out after {CODON_BUILD_TIMEOUT} seconds'
+                return result
+            if build.returncode != 0:
+                result['exception'] = build.stderr
+                return result
+            command = [binary]
+        else:
+            command = [executable, filepath]
         
-        result['stdout'] = stdout_capture.getvalue()
-        result['stderr'] = stderr_capture.getvalue()
-        result['success'] = True
+        completed = subprocess.run(
+            sandboxed_command(command, memory_limit=ENGINE_MEMORY_LIMITS[engine]),
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            timeout=EXEC_TIMEOUT
+        )
+        result['stdout'] = completed.stdout
+        if completed.returncode == 0:
+            result['stderr'] = completed.stderr
+            result['success'] = True
+        elif completed.returncode < 0:
+            # Killed by a signal, e.g. SIGXCPU from the CPU limit
+            result['exception'] = completed.stderr or f'Execution was terminated by signal {-completed.returncode}'
+        else:
+            result['exception'] = completed.stderr
+    except subprocess.TimeoutExpired:
+        result['exception'] = f'Execution timed out after {EXEC_TIMEOUT} seconds'
     except Exception as e:
         result['exception'] = traceback.format_exc()
     finally:
-        # Restore sys.path
-        sys.path = original_sys_path
+        if binary is not None and os.path.exists(binary):
+            os.remove(binary)
     
     return result
 
 
+SNIPPET_CACHE_MAX_BYTES = 16 * 1024 * 1024  # Total snippet text kept by the load cache
+_snippet_cache = OrderedDict()  # snippet id -> (updated_at, snippet dict)
+_snippet_cache_bytes = 0
+_snippet_cache_lock = threading.Lock()
+
+
+def _snippet_size(snippet_dict):
+    return len(snippet_dict['code']) + len(snippet_dict['title']) + len(snippet_dict['description'] or '')
+
+
+def forget_snippet(snippet_id):
+    """Drop a snippet from the load cache."""
+    global _snippet_cache_bytes
+    with _snippet_cache_lock:
+        entry = _snippet_cache.pop(snippet_id, None)
+        if entry is not None:
+            _snippet_cache_bytes -= _snippet_size(entry[1])
+
+
+def get_snippet_dict(snippet_id, updated_at):
+    """Serialize a snippet, reusing the cached dict while its updated_at is unchanged."""
+    global _snippet_cache_bytes
+    with _snippet_cache_lock:
+        entry = _snippet_cache.get(snippet_id)
+        if entry is not None and entry[0] == updated_at:
+            _snippet_cache.move_to_end(snippet_id)
+            return entry[1]
+    
+    snippet = db.session.get(CodeSnippet, snippet_id)
+    forget_snippet(snippet_id)
+    if snippet is None:
+        # Deleted since the caller looked it up
+        return None
+    
+    snippet_dict = snippet.to_dict()
+    size = _snippet_size(snippet_dict)
+    with _snippet_cache_lock:
+        if size <= SNIPPET_CACHE_MAX_BYTES and snippet_id not in _snippet_cache:
+            _snippet_cache[snippet_id] = (snippet.updated_at, snippet_dict)
+            _snippet_cache_bytes += size
+            # Evict least recently loaded snippets until back under budget
+            while _snippet_cache_bytes > SNIPPET_CACHE_MAX_BYTES:
+                _, (_, evicted) = _snippet_cache.popitem(last=False)
+                _snippet_cache_bytes -= _snippet_size(evicted)
+    return snippet_dict
+
+
+def snippet_listing_query():
+    """Build the snippet listing query, loading only the columns the listing shows."""
+    return db.select(CodeSnippet).options(
+        load_only(CodeSnippet.id, CodeSnippet.title, CodeSnippet.description, CodeSnippet.updated_at)
+    ).order_by(CodeSnippet.updated_at.desc())
+
+
+@cache.memoize(60)
+def _list_snippets():
+    """Get the most recent code snippets as plain dicts, cached between saves."""
+    with db.session.no_autoflush:
+        snippets = db.session.scalars(snippet_listing_query().limit(SNIPPETS_PER_PAGE)).all()
+    return [{
+        'id': snippet.id,
+        'title': snippet.title,
+        'description': snippet.description,
+        'updated_at': snippet.updated_at
+    } for snippet in snippets]
+
+
 @app.route('/')
 def index():
     """Render the main page."""
-    # Clean up any temporary files
-    cleanup_temp_files()
     # Get saved code snippets for display
-    snippets = CodeSnippet.query.order_by(CodeSnippet.updated_at.desc()).all()
+    snippets = _list_snippets()
     return render_template('index.html', snippets=snippets)
 
 
+@app.route('/snippets', methods=['GET'])
+def list_snippets():
+    """Return a page of saved code snippets without their code."""
+    page = request.args.get('page', 1, type=int)
+    pagination = db.paginate(snippet_listing_query(), page=page, per_page=SNIPPETS_PER_PAGE, error_out=False)
+    
+    return jsonify({
+        'snippets': [{
+            'id': snippet.id,
+            'title': snippet.title,
+            'description': snippet.description,
+            'updated_at': snippet.updated_at.isoformat() if snippet.updated_at else None
+        } for snippet in pagination.items],
+        'page': pagination.page,
+        'pages': pagination.pages,
+        'total': pagination.total
+    })
+
+
 @app.route('/save-snippet', methods=['POST'])
 def save_snippet():
     """Save a code snippet to the database."""
@@ -160,12 +457,19 @@ def save_snippet():
     # Check if we're updating an existing snippet
     snippet_id = data.get('id')
     if snippet_id:
-        snippet = CodeSnippet.query.get(snippet_id)
+        # Update in a single UPDATE ... RETURNING round trip
+        snippet = db.session.execute(
+            update(CodeSnippet)
+            .where(CodeSnippet.id == snippet_id)
+            .values(
+                title=data['title'],
+                code=data['code'],
+                description=data.get('description', '')
+            )
+            .returning(CodeSnippet)
+        ).scalar_one_or_none()
         if not snippet:
             return jsonify({'error': 'Snippet not found'}), 404
-        snippet.title = data['title']
-        snippet.code = data['code']
-        snippet.description = data.get('description', '')
         message = 'Code snippet updated successfully'
     else:
         # Create a new snippet
@@ -178,33 +482,47 @@ def save_snippet():
         db.session.add(snippet)
         message = 'Code snippet saved successfully'
     
+    # Serialize before commit so the snippet isn't reloaded after it is expired
+    db.session.flush()
+    snippet_dict = snippet.to_dict()
     db.session.commit()
+    cache.delete_memoized(_list_snippets)
     
     return jsonify({
         'message': message,
-        'snippet': snippet.to_dict()
+        'snippet': snippet_dict
     })
 
 
 @app.route('/load-snippet/<int:snippet_id>', methods=['GET'])
 def load_snippet(snippet_id):
     """Load a code snippet from the database."""
-    snippet = CodeSnippet.query.get(snippet_id)
-    if not snippet:
-        return jsonify({'error': 'Snippet not found'}), 404
-    
-    return jsonify(snippet.to_dict())
+    # Only fetch the cache key; the full row is loaded on a cache miss
+    with db.session.no_autoflush:
+        row = db.session.execute(
+            db.select(CodeSnippet.updated_at).filter_by(id=snippet_id)
+        ).first()
+        if not row:
+            return jsonify({'error': 'Snippet not found'}), 404
+        
+        snippet_dict = get_snippet_dict(snippet_id, row.updated_at)
+        if snippet_dict is None:
+            return jsonify({'error': 'Snippet not found'}), 404
+        
+        return jsonify(snippet_dict)
 
 
 @app.route('/delete-snippet/<int:snippet_id>', methods=['DELETE'])
 def delete_snippet(snippet_id):
     """Delete a code snippet from the database."""
-    snippet = CodeSnippet.query.get(snippet_id)
+    snippet = db.session.get(CodeSnippet, snippet_id)
     if not snippet:
         return jsonify({'error': 'Snippet not found'}), 404
     
     db.session.delete(snippet)
     db.session.commit()
+    cache.delete_memoized(_list_snippets)
+    forget_snippet(snippet_id)
     
     return jsonify({'message': 'Code snippet deleted successfully'})
 
@@ -222,28 +540,31 @@ def upload_file():
         flash('No selected file', 'danger')
         return jsonify({'error': 'No selected file'}), 400
     
-    uploaded_files = []
+    uploads = []
     compile_results = []
     
     for file in files:
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
             filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            uploaded_files.append(filepath)
-            
-            # Compile the file
-            error, success = compile_python_file(filepath)
-            compile_results.append({
-                'filename': filename,
-                'success': success,
-                'error': error,
-                'filepath': filepath
-            })
+            uploads.append((file, filepath))
         else:
             flash(f'Invalid file: {file.filename}. Only Python files (.py) are allowed.', 'danger')
     
-    session['uploaded_files'] = uploaded_files
+    # Save all the files in one batch
+    save_uploaded_files(uploads)
+    uploaded_files = [filepath for _, filepath in uploads]
+    
+    # Compile all the files in one batch
+    for filepath, (error, success) in zip(uploaded_files, compile_python_files(uploaded_files)):
+        compile_results.append({
+            'filename': os.path.basename(filepath),
+            'success': success,
+            'error': error,
+            'filepath': filepath
+        })
+    
+    track_uploaded_files(uploaded_files)
     
     return jsonify({
         'message': 'Files uploaded successfully' if uploaded_files else 'No valid files uploaded',
@@ -259,17 +580,22 @@ def compile_code():
         return jsonify({'error': 'No code provided'}), 400
     
     # Generate a random filename for the code
-    import uuid
-    filename = f"code_{uuid.uuid4().hex[:8]}.py"
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    filename = f"code_{secrets.token_hex(4)}.py"
+    filepath = None
     
-    # Write the code to a temporary file
     try:
-        with open(filepath, 'w') as f:
-            f.write(data['code'])
+        # Compile the code in memory
+        error, success = compile_python_source(data['code'], filename)
+        
+        # Only code that compiled can be executed, so only that is written to disk
+        if success:
+            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            with open(filepath, 'w') as f:
+                f.write(data['code'])
+            
+            # Add to session for cleanup later
+            track_uploaded_files([filepath])
         
-        # Compile the file
-        error, success = compile_python_file(filepath)
         compile_result = {
             'filename': filename,
             'success': success,
@@ -277,11 +603,6 @@ def compile_code():
             'filepath': filepath
         }
         
-        # Add to session for cleanup later
-        if 'uploaded_files' not in session:
-            session['uploaded_files'] = []
-        session['uploaded_files'].append(filepath)
-        
         return jsonify({
             'message': 'Code compiled successfully' if success else 'Compilation failed',
             'compile_results': [compile_result]
@@ -295,10 +616,14 @@ def compile_code():
 def execute_code():
     """Execute uploaded Python code."""
     data = request.get_json()
-    if not data or 'filepath' not in data:
+    # Failed compiles report a null filepath, so check its type as well as its presence
+    if not data or not isinstance(data.get('filepath'), str):
         return jsonify({'error': 'No filepath provided'}), 400
     
     filepath = data['filepath']
+    engine = request.args.get('engine', 'cpython')
+    if engine != 'cpython' and engine not in EXECUTION_ENGINES:
+        return jsonify({'error': f'Unknown execution engine: {engine}'}), 400
     
     # Verify the file is in the upload directory for security
     if not os.path.normpath(filepath).startswith(os.path.normpath(app.config['UPLOAD_FOLDER'])):
@@ -308,7 +633,10 @@ def execute_code():
         return jsonify({'error': 'File not found'}), 404
     
     # Execute the Python code
-    result = execute_python_code(filepath)
+    if engine == 'cpython':
+        result = execute_python_code(filepath)
+    else:
+        result = execute_with_engine(filepath, engine)
     return jsonify(result)
 
 
@@ -319,11 +647,5 @@ def request_entity_too_large(error):
     return render_template('index.html'), 413
 
 
-@app.teardown_appcontext
-def teardown_db(exception=None):
-    """Clean up resources when the application context ends."""
-    cleanup_temp_files()
-
-
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -4,5 +4,9 @@ from app import app
 
 # Make sure database tables are created
 with app.app_context():
-    from app import db
-    db.create_all()
\ No newline at end of file
+    from extensions import db
+    import models  # Register the models before creating their tables
+    db.create_all()
+    # create_all() skips tables that already exist, so add any newly declared indexes to them
+    for index in models.CodeSnippet.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from main import db
+from extensions import db
 
 class CodeSnippet(db.Model):
     __tablename__ = 'code_snippets'
@@ -12,6 +12,15 @@ class CodeSnippet(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Covers the snippet listing so Postgres can answer it with an index-only scan
+        db.Index(
+            'ix_snippets_updated_desc',
+            updated_at.desc(),
+            postgresql_include=['id', 'title', 'description']
+        ),
+    )
+    
     def __repr__(self):
         return f"<CodeSnippet {self.title}>"
     
@@ -24,4 +33,4 @@ class CodeSnippet(db.Model):
             'language': self.language,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
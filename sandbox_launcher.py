@@ -0,0 +1,22 @@
+"""
+Apply sandbox resource limits, then replace this process with a command.
+
+Usage: python sandbox_launcher.py CPU_SECONDS MEMORY_BYTES COMMAND [ARGS...]
+
+subprocess's preexec_fn can deadlock the child when the parent has other
+threads running, so the limits are set here in a fresh interpreter instead.
+"""
+import os
+import sys
+import resource
+
+
+def main(argv):
+    cpu_seconds, memory_limit = int(argv[1]), int(argv[2])
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    os.execvp(argv[3], argv[3:])
+
+
+if __name__ == '__main__':
+    main(sys.argv)
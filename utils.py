@@ -1,41 +1,266 @@
 """Utility functions for Python compilation and execution."""
 
 import os
+import re
 import sys
 import io
 import traceback
+import hashlib
+import signal
 import py_compile
+from collections import OrderedDict
 from contextlib import redirect_stdout, redirect_stderr
 import logging
 
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import liburing
+    # The engine targets the 2024.x C-style binding; later releases changed the API
+    HAS_LIBURING = sys.platform == 'linux' and hasattr(liburing, 'io_uring')
+except ImportError:
+    liburing = None
+    HAS_LIBURING = False
+
 logger = logging.getLogger(__name__)
 
+# Resource limits applied to sandboxed code execution
+EXEC_CPU_SECONDS = 2
+EXEC_TIMEOUT = 5  # Wall-clock seconds a single run may take
+EXEC_MEMORY_LIMIT = 512 * 1024 * 1024  # 512MB address space
+
+# List of dangerous functions/imports
+DANGEROUS_PATTERNS = [
+    'os.system(',
+    'subprocess',
+    'eval(',
+    'exec(',
+    '__import__(',
+    'importlib',
+    'open(',
+    'file(',
+    'globals(',
+    'locals(',
+    'compile(',
+]
+
+# Single pre-compiled alternation so the code is scanned once per call
+_DANGEROUS_RE = re.compile('|'.join(map(re.escape, DANGEROUS_PATTERNS)))
+
 def sanitize_python_code(code):
     """
     Remove potentially harmful code patterns.
     This is a basic implementation and not a complete security solution.
     """
-    # List of dangerous functions/imports
-    dangerous_patterns = [
-        'os.system(',
-        'subprocess',
-        'eval(',
-        'exec(',
-        '__import__(',
-        'importlib',
-        'open(',
-        'file(',
-        'globals(',
-        'locals(',
-        'compile(',
-    ]
-    
-    for pattern in dangerous_patterns:
-        if pattern in code:
-            return False, f"Potentially unsafe code detected: {pattern}"
+    match = _DANGEROUS_RE.search(code)
+    if match:
+        return False, f"Potentially unsafe code detected: {match.group(0)}"
     
     return True, code
 
+def compile_python_source(source, filename='<snippet>'):
+    """Compile Python source in memory and return any errors."""
+    try:
+        compile(source, filename, 'exec')
+        return None, True
+    except SyntaxError as e:
+        return f"{e.msg} at line {e.lineno}", False
+    except Exception as e:
+        return traceback.format_exc(), False
+
+def compile_python_file(filepath):
+    """Compile a Python file and return any errors."""
+    try:
+        # Read bytes so compile() honours a BOM or PEP 263 coding cookie
+        with open(filepath, 'rb') as f:
+            source = f.read()
+    except Exception as e:
+        return traceback.format_exc(), False
+    return compile_python_source(source, os.path.basename(filepath))
+
+class IoUringBatchEngine:
+    """
+    Write a batch of files with io_uring.
+    All writes in a batch are submitted with a single syscall instead of one
+    blocking write per file.
+    """
+
+    def __init__(self, queue_depth=32):
+        self.queue_depth = queue_depth
+        self.ring = liburing.io_uring()
+        self.cqe = liburing.io_uring_cqe()
+        liburing.io_uring_queue_init(queue_depth, self.ring, 0)
+
+    def close(self):
+        liburing.io_uring_queue_exit(self.ring)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_files(self, items):
+        """Write each (filepath, data) pair, truncating existing files."""
+        # Concurrent writes to the same path would interleave, so the last one wins
+        items = list(dict(items).items())
+        for start in range(0, len(items), self.queue_depth):
+            self._write_batch(items[start:start + self.queue_depth])
+
+    def _write_batch(self, items):
+        fds = []
+        try:
+            for index, (filepath, data) in enumerate(items):
+                fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                fds.append(fd)
+                sqe = liburing.io_uring_get_sqe(self.ring)
+                liburing.io_uring_prep_write(sqe, fd, data, len(data), 0)
+                liburing.io_uring_sqe_set_data64(sqe, index)
+            liburing.io_uring_submit(self.ring)
+            
+            for _ in items:
+                liburing.io_uring_wait_cqe(self.ring, self.cqe)
+                cqe = self.cqe[0]
+                index, res = liburing.io_uring_cqe_get_data64(cqe), cqe.res
+                liburing.io_uring_cqe_seen(self.ring, cqe)
+                written = liburing.trap_error(res)
+                # Finish any short write synchronously
+                data = items[index][1]
+                while written < len(data):
+                    written += os.pwrite(fds[index], data[written:], written)
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+class ExecutionLimitExceeded(BaseException):
+    """Raised inside a sandbox worker when user code runs past its time or CPU limit."""
+
+_limit_signalled = False
+
+def _raise_limit_exceeded(signum, frame):
+    global _limit_signalled
+    if _limit_signalled:
+        # The code swallowed the first interrupt; give up on this worker
+        os._exit(1)
+    _limit_signalled = True
+    if signum == signal.SIGALRM:
+        raise ExecutionLimitExceeded(f'Execution timed out after {EXEC_TIMEOUT} seconds')
+    raise ExecutionLimitExceeded(f'Execution exceeded its CPU limit of {EXEC_CPU_SECONDS} seconds')
+
+def init_sandbox():
+    """
+    Initialize a sandbox worker process by capping its address space.
+    Time and CPU limits interrupt the running task rather than killing the
+    worker, so one runaway snippet doesn't break the pool for everyone else.
+    """
+    if resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (EXEC_MEMORY_LIMIT, EXEC_MEMORY_LIMIT))
+    if hasattr(signal, 'SIGALRM'):
+        signal.signal(signal.SIGALRM, _raise_limit_exceeded)
+        signal.signal(signal.SIGXCPU, _raise_limit_exceeded)
+
+SANDBOX_LAUNCHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox_launcher.py')
+
+def sandboxed_command(command, cpu_seconds=EXEC_CPU_SECONDS, memory_limit=EXEC_MEMORY_LIMIT):
+    """Wrap a command so that it runs under the given CPU and memory limits."""
+    if resource is None:
+        return command
+    # -I -S keeps the launcher's own startup to the bare interpreter
+    return [sys.executable, '-I', '-S', SANDBOX_LAUNCHER, str(cpu_seconds), str(memory_limit)] + command
+
+def _limit_cpu_time():
+    """Allow the current task EXEC_CPU_SECONDS on top of the CPU the worker has already used."""
+    if resource is None:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + EXEC_CPU_SECONDS
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+def _clear_cpu_time_limit():
+    """Lift the per-task CPU limit so SIGXCPU can't fire between tasks."""
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+# Compiled code objects keyed on a hash of their source, kept per worker process
+CODE_CACHE_SIZE = 256
+_code_cache = OrderedDict()
+
+def compile_cached(code, filepath):
+    """Compile Python code, reusing the code object if the same source was compiled before."""
+    # The filepath is part of the key because it is baked into the code object
+    if isinstance(code, str):
+        code = code.encode()
+    key = hashlib.blake2b(filepath.encode() + b"\0" + code, digest_size=8).digest()
+    compiled_code = _code_cache.get(key)
+    if compiled_code is not None:
+        _code_cache.move_to_end(key)
+        return compiled_code
+    
+    compiled_code = compile(code, filepath, 'exec')
+    _code_cache[key] = compiled_code
+    if len(_code_cache) > CODE_CACHE_SIZE:
+        _code_cache.popitem(last=False)
+    return compiled_code
+
+def run_python_code(code, filepath):
+    """
+    Execute Python code and capture its output.
+    Meant to run inside a sandbox worker process started with init_sandbox.
+    """
+    stdout_capture = io.StringIO()
+    stderr_capture = io.StringIO()
+    
+    # Create a new environment for execution
+    original_sys_path = sys.path.copy()
+    sys.path.insert(0, os.path.dirname(filepath))
+    
+    result = {
+        'stdout': '',
+        'stderr': '',
+        'exception': '',
+        'success': False
+    }
+    
+    global _limit_signalled
+    _limit_signalled = False
+    try:
+        try:
+            _limit_cpu_time()
+            if hasattr(signal, 'setitimer'):
+                # Re-fires every second so code that swallows the first interrupt is stopped
+                signal.setitimer(signal.ITIMER_REAL, EXEC_TIMEOUT, 1)
+            # Capture stdout and stderr
+            with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
+                compiled_code = compile_cached(code, filepath)
+                exec(compiled_code, {})
+        finally:
+            if hasattr(signal, 'setitimer'):
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            _clear_cpu_time_limit()
+        
+        result['stdout'] = stdout_capture.getvalue()
+        result['stderr'] = stderr_capture.getvalue()
+        result['success'] = True
+    except ExecutionLimitExceeded as e:
+        result['exception'] = str(e)
+    except BaseException as e:
+        # SystemExit and friends must not escape the worker into the web process
+        result['exception'] = traceback.format_exc()
+    finally:
+        # Restore sys.path
+        sys.path = original_sys_path
+    
+    return result
+
 def get_file_content(filepath):
     """Get the content of a file."""
     try:
@@ -47,27 +272,15 @@ def get_file_content(filepath):
 
 def format_traceback(tb):
     """Format a traceback for display."""
-    lines = tb.split('\n')
-    # Remove file paths that might reveal system information
-    formatted_lines = []
-    for line in lines:
-        if line.strip():
-            formatted_lines.append(line)
-    return '\n'.join(formatted_lines)
+    return '\n'.join(line for line in tb.split('\n') if line.strip())
+
+# Matches traceback lines of the form: File "/path/to/file.py", line N
+_FILE_LINE_RE = re.compile(r'^(\s*File ")([^"]+)(".*)$')
+
+def _basename_sub(match):
+    return f'{match.group(1)}{os.path.basename(match.group(2))}{match.group(3)}'
 
 def format_syntax_error(error_message):
     """Format syntax error message for display."""
-    lines = error_message.split('\n')
-    formatted_lines = []
-    
-    for line in lines:
-        # Skip lines with system paths
-        if "File " in line and "/" in line:
-            parts = line.split('"')
-            if len(parts) >= 3:
-                filename = os.path.basename(parts[1])
-                formatted_lines.append(f'  File "{filename}"{parts[2]}')
-        else:
-            formatted_lines.append(line)
-            
-    return '\n'.join(formatted_lines)
+    # Strip system paths down to the file name
+    return '\n'.join(_FILE_LINE_RE.sub(_basename_sub, line) for line in error_message.split('\n'))